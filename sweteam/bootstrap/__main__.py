@@ -20,6 +20,7 @@ import yaml
 from . import utils, logging, logger
 from .config import config
 from .defs import AgentFactory, BaseAgent
+from .defs.agent_defs import agents_dir, load_agents
 from .utils.log import logging_context
 from .orchestrator import OrchestratorFactory, Orchestrator
 
@@ -29,17 +30,14 @@ def main():
     orchestrator: Orchestrator
     if __package__ and __package__.endswith("bootstrap"):
         print(f"Warning, Current package name: {__package__}")
-    agents_dir = os.path.join(os.path.dirname(__file__), 'agents')
     logger.debug(f"package name: {__package__}")
-    agents_list = [entry.removesuffix(".json") for entry in os.listdir(
-        agents_dir) if entry.endswith(".json")]
+    agents_json = load_agents()
     with OrchestratorFactory.create(type="ollama") as orchestrator:
         with contextlib.ExitStack() as stack:
-            for agt in agents_list:
+            for agt, agt_json in agents_json.items():
                 agt_cfg: BaseAgent.AgentConfig
                 try:
-                    agt_cfg = BaseAgent.AgentConfig(json.load(
-                        open(os.path.join(agents_dir, agt + ".json"))))
+                    agt_cfg = BaseAgent.AgentConfig(json.loads(agt_json))
                     logger.debug("loaded agent %s: %s", agt, agt_cfg)
                 except Exception as e:
                     logger.error(
@@ -9,6 +9,8 @@ from ..utils.log import get_logger
 
 class BaseAgent(ABC):
     _instances = []
+    # instances(True) results per class, invalidated whenever a new agent registers
+    _instances_cache: dict = {}
 
     class AgentConfig:
         model = "mistral-nemo:latest"
@@ -84,10 +86,13 @@ class BaseAgent(ABC):
         self.logger = get_logger(
             f'{self.__class__.__name__ or ""}[{self.name}]')
         self.__class__._instances.append(self)
+        BaseAgent._instances_cache.clear()
 
     @classmethod
-    def instances(cls, include_children: bool = True) -> list:
+    def instances(cls, include_children: bool = True) -> tuple:
         if include_children:
+            if (cached_instances := BaseAgent._instances_cache.get(cls)) is not None:
+                return cached_instances
             temp_instances = set()
             # Iterate through all direct child classes
             for subclass in cls.__subclasses__():
@@ -96,13 +101,14 @@ class BaseAgent(ABC):
             # Include instances of the current class as well
             if hasattr(cls, '_instances'):
                 temp_instances.update(cls._instances)
-            return list(temp_instances)
+            BaseAgent._instances_cache[cls] = tuple(temp_instances)
+            return BaseAgent._instances_cache[cls]
         else:
-            return cls._instances  # Return the list of all instances for this class
+            return tuple(cls._instances)  # Return all instances of this class, as a tuple like the cached path
  
     # method to list/read/write issues
     def issue_manager(self, action: str, issue: str = '',
-                      only_in_state: list = [], content: str = None,
+                      only_in_state: list | None = None, content: str = None,
                       assignee: str = None):
         return issue_manager(action, issue, only_in_state, content, assignee, caller=self.name)
 
@@ -8,7 +8,7 @@ from datetime import datetime
 from typing import Sequence, Self, List, Dict
 from ..config import config
 from ..utils import issue_manager, dir_structure, execute_module, execute_command
-from .agent_defs import standard_tools
+from .agent_defs import agents_dir, get_tools_for_agent
 from . import msg_logger, BaseAgent
 from pydantic import BaseModel
 
@@ -60,7 +60,7 @@ class Ollama_Agent(BaseAgent):
 
         if self.config.use_tools:
             self.tools = self.config.tools
-            self.tools.extend(standard_tools)
+            self.tools.extend(json.loads(get_tools_for_agent(self.name)))
         else:
             self.tools = []
 
@@ -247,7 +247,6 @@ class Ollama_Agent(BaseAgent):
             the_other_agent.performance_factor *= 1 + max(score, 10) / 100
             if additional_instructions:
                 the_other_agent.additional_instructions = additional_instructions
-            agent_dir = os.path.join(os.path.dirname(__file__), "agents")
             new_eval = {"timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f"),
                         "evaluated by": self.name,
                         "score": score,
@@ -255,7 +254,7 @@ class Ollama_Agent(BaseAgent):
                         }
             new_eval_yaml = yaml.dump(
                 [new_eval], default_flow_style=False, sort_keys=False)
-            with open(os.path.join(agent_dir, agent_name + ".feedback.yaml"), 'a+') as yamlfile:
+            with open(os.path.join(agents_dir, agent_name + ".feedback.yaml"), 'a+') as yamlfile:
                 yamlfile.write("\n" + new_eval_yaml)
             self.logger.debug(f"<{self.name}> - evaluate_agent, agent {agent_name}"
                               f" new performance score is {the_other_agent.performance_factor}.")
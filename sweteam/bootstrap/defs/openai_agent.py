@@ -10,7 +10,7 @@ from openai import OpenAI, AzureOpenAI
 import yaml
 from ..config import config
 from . import msg_logger, BaseAgent
-from .agent_defs import standard_tools
+from .agent_defs import agents_dir, get_tools_for_agent
 
 
 class OpenAI_Agent(BaseAgent):
@@ -68,7 +68,7 @@ class OpenAI_Agent(BaseAgent):
         self.config = self.AgentConfig(agent_config)
 
         self.temperature = self.config.temperature
-        self.config.tools.extend(standard_tools)
+        self.config.tools.extend(json.loads(get_tools_for_agent(self.name)))
         self.config.tools.extend([{"type": "code_interpreter"},
                                   {"type": "file_search"}])
         chat_function_tools = [tool for tool in self.config.tools
@@ -589,7 +589,6 @@ class OpenAI_Agent(BaseAgent):
             the_other_agent.performance_factor *= 1 + max(score, 10) / 100
             if additional_instructions:
                 the_other_agent.additional_instructions = additional_instructions
-            agent_dir = os.path.join(os.path.dirname(__file__), "agents")
             new_eval = {"timestamp": datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f"),
                         "evaluated by": self.name,
                         "score": score,
@@ -597,7 +596,7 @@ class OpenAI_Agent(BaseAgent):
                         }
             new_eval_yaml = yaml.dump(
                 [new_eval], default_flow_style=False, sort_keys=False)
-            with open(os.path.join(agent_dir, agent_name + ".feedback.yaml"), 'a+') as yamlfile:
+            with open(os.path.join(agents_dir, agent_name + ".feedback.yaml"), 'a+') as yamlfile:
                 yamlfile.write("\n" + new_eval_yaml)
             self.logger.debug(f"<{self.name}> - evaluate_agent, agent {agent_name}"
                               f" new performance score is {the_other_agent.performance_factor}.")
@@ -629,7 +628,6 @@ class OpenAI_Agent(BaseAgent):
             raise Exception(f"Agent {agent_name} not found")
 
     def upload_issues_as_vector_store(self, issue_number: str = None) -> str:
-        import os
         ISSUE_VECTOR_STORE_NAME = "issues"
         # Create a vector store caled "Financial Statements"
         try:
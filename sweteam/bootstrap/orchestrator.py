@@ -4,12 +4,21 @@ The goal of this agent is not to innovate, rather, you check other agent's respo
 """
 
 import json
-from re import A
-from pydantic import BaseModel
+import re
+from types import MappingProxyType
+from pydantic import BaseModel, TypeAdapter
 from . import logger, config
 from .utils import issue_manager
 from .defs import BaseAgent, ollama_agent, openai_agent
-from .defs.agent_defs import standard_tools, tool_instructions
+from .defs.agent_defs import tool_instructions
+
+# cheap syntactic check that a response includes code snippets: markdown code fences or unified diffs.
+# a match is conclusive, no match is not, unfenced code still needs the LLM to recognize it
+_CODE_FENCE_RE = re.compile(r"```[a-zA-Z0-9_+\-]*\n|diff --git |\n@@ ", re.MULTILINE)
+ISSUE_STAGES = ("plan", "coding", "testing", "deploy")
+# open issue statuses that alone tell which stage an issue is in, no need to ask the LLM.
+# an "in progress" or "open" issue can be in any stage, the LLM decides from its content
+_STATUS_TO_STAGE = {"new": "plan"}
 
 
 class Orchestrator(BaseAgent):
@@ -27,6 +36,9 @@ class Orchestrator(BaseAgent):
         confidence_percentage: float
         exaplanation: str
 
+    _BINARY_TA = TypeAdapter(BinaryAnswer)
+    _BINARY_SCHEMA = MappingProxyType(BinaryAnswer.model_json_schema())
+
     def is_true(self, question: str, usr_prompt: str = "", agt_response: str = "") -> BinaryAnswer:
         """
         Determine if the given response means a certain thing is true.
@@ -45,7 +57,6 @@ class Orchestrator(BaseAgent):
         self.logger.debug("Checking if %s is True for user prompt: %s and agent response: %s",
                           question, usr_prompt, agt_response)
 
-        is_true_format = self.BinaryAnswer.model_json_schema()
         is_true_instruction = ("With the above message history, "
                                f"Using structured format, answer if '{question}' is True or False, "
                                f"from 0 to 100, how confident is your answer, and explain why.\n")
@@ -62,12 +73,12 @@ class Orchestrator(BaseAgent):
                       {'role': 'user',
                        'content': is_true_instruction}
                       ],
-            format=is_true_format,
+            format=self._BINARY_SCHEMA,
             options={
                 'temperature': self.config.temperature}
         )
         if hasattr(is_true_response, 'message') and hasattr(is_true_response.message, 'content'):
-            structrued_is_true_response = self.BinaryAnswer.model_validate_json(is_true_response.message.content)
+            structrued_is_true_response = self._BINARY_TA.validate_json(is_true_response.message.content)
         else:
             structrued_is_true_response = self.BinaryAnswer(is_true=False, confidence_level=0.0,
                                                             exaplanation="No response from LLM.")
@@ -80,6 +91,9 @@ class Orchestrator(BaseAgent):
         answer: str
         explanation: str
 
+    _DISTILL_TA = TypeAdapter(DistilledAnswer)
+    _DISTILL_SCHEMA = MappingProxyType(DistilledAnswer.model_json_schema())
+
     def distill(self, question: str = "", usr_prompt: str = "", agt_response: str = "") -> DistilledAnswer:
         """
         Convert the agent's response into a structured answer format.
@@ -99,7 +113,6 @@ class Orchestrator(BaseAgent):
         self.logger.debug("Converting response to structured answer from agent..."
                           "Response: %s", agt_response)
 
-        structured_answer_format = self.DistilledAnswer.model_json_schema()
         structured_answer_instruction = (f"Extract the concise answer to the question '{question}' from the user "
                                          "prompt and agent response. Provide the answer in a structured format with an explanation.\n")
 
@@ -113,12 +126,12 @@ class Orchestrator(BaseAgent):
             model=self.config.model,
             messages=[*message_history,
                       {'role': 'user', 'content': structured_answer_instruction}],
-            format=structured_answer_format,
+            format=self._DISTILL_SCHEMA,
             options={'temperature': self.config.temperature}
         )
 
         if hasattr(structured_answer_response, 'message') and hasattr(structured_answer_response.message, 'content'):
-            structured_answer = self.DistilledAnswer.model_validate_json(structured_answer_response.message.content)
+            structured_answer = self._DISTILL_TA.validate_json(structured_answer_response.message.content)
         else:
             structured_answer = self.DistilledAnswer(answer="", explanation="No response from LLM.")
 
@@ -130,6 +143,9 @@ class Orchestrator(BaseAgent):
         steps: list
         explanation: str
 
+    _BREAKDOWN_TA = TypeAdapter(BreakdownAnswer)
+    _BREAKDOWN_SCHEMA = MappingProxyType(BreakdownAnswer.model_json_schema())
+
     def break_down(self, usr_prompt: str = "", agt_response: str = "") -> BreakdownAnswer:
         """
         Break down the agent's response into a structured format.
@@ -149,7 +165,6 @@ class Orchestrator(BaseAgent):
         self.logger.debug("Breaking down response from agent..."
                           "Response: %s", agt_response)
 
-        response_breakdown_format = self.BreakdownAnswer.model_json_schema()
         response_breakdown_instruction = (f"The assistant agent's response provided the following response, "
                                           f"please transform the response into a structured format of a list of steps: {agt_response}\n")
         breakdown_response = self.llm_client.chat(
@@ -159,11 +174,11 @@ class Orchestrator(BaseAgent):
                 {'role': 'assistant', 'content': agt_response},
                 {'role': 'user', 'content': response_breakdown_instruction}
             ],
-            format=response_breakdown_format,
+            format=self._BREAKDOWN_SCHEMA,
             options={
                 'temperature': self.config.temperature}
         )
-        structured_breakdown_response = self.BreakdownAnswer.model_validate_json(breakdown_response.message.content)
+        structured_breakdown_response = self._BREAKDOWN_TA.validate_json(breakdown_response.message.content)
 
         self.logger.debug("Structured breakdown response: %s", structured_breakdown_response.steps)
         self.logger.debug("Structured breakdown Explanation: %s", structured_breakdown_response.explanation)
@@ -174,6 +189,9 @@ class Orchestrator(BaseAgent):
         score: float
         explanation: str
 
+    _EVAL_TA = TypeAdapter(ResponseEvaluation)
+    _EVAL_SCHEMA = MappingProxyType(ResponseEvaluation.model_json_schema())
+
     def evalate_response(self, to_agt_prompt, agt_response: str, issue: dict) -> ResponseEvaluation:
         """Review the response from an agent and update the issue details accordingly.
 
@@ -186,7 +204,6 @@ class Orchestrator(BaseAgent):
             ResponseEvaluation: The updated issue details.
         """
 
-        response_review_format = self.ResponseEvaluation.model_json_schema()
         response_review_instruction = ("Based on the provided user prompt and assistant response, "
                                        "How well did the assistant address the user request? "
                                        "Where a score of 0 means completely failure and a score of 10 means extremely well. "
@@ -199,14 +216,14 @@ class Orchestrator(BaseAgent):
                 {'role': 'user',
                     'content': response_review_instruction}
             ],
-            format=response_review_format,
+            format=self._EVAL_SCHEMA,
             options={
                 'temperature': self.config.temperature}
         )
         if hasattr(review_response, 'message') and hasattr(review_response.message, 'content'):
-            structrued_review_response = self.ResponseEvaluation.model_validate_json(review_response.message.content)
+            structrued_review_response = self._EVAL_TA.validate_json(review_response.message.content)
         else:
-            structrued_review_response = self.ResponseEvaluation.model_validate_json(
+            structrued_review_response = self._EVAL_TA.validate_python(
                 {"score": -1, "explanation": "evaluation failed to return a response."})
 
         self.logger.debug("Reviewing response from agent...")
@@ -245,16 +262,37 @@ class Orchestrator(BaseAgent):
 
             return open_issues if isinstance(open_issues, list) else [open_issues]
 
-        agents: list[BaseAgent] = BaseAgent.instances(True)
+        agents: tuple[BaseAgent, ...] = BaseAgent.instances(True)
         agent_roles = []
         for agt in agents:
             agent_roles.append((agt.name, self.distill("What is the role of the agent?", "",
                                                        agt.config.instruction).answer))
 
+        # prompts are resolved once per orchestrate() call, only the agent name and issue number vary per issue.
+        # the tool instructions are kept out of the str.format templates as they contain literal braces
+        assign_issue_template = ("Issue {issue_number} is assigned to {assignee},  "
+                                 "which does not exist. Based on these roles descriptions, use the issue_manager tool "
+                                 "action=assign to assign this issue to the most appropriate agent.\n").format
+        assign_issue_instructions = (f"agent_roles: {agent_roles}."
+                                     f"issue_manager() tool instruction: {tool_instructions['issue_manager']}")
+        update_issue_template = ("The assistant {agt} provided the following response. "
+                                 "use issue_manager(action='update'...) to update the issue {issue_number} "
+                                 'and if needed, its sub-issues, according to the response provided by the assistant. ').format
+        save_code_template = ("The assistant {agt} provided code snippets in the response. "
+                              "Please evaluate if these code snippets should be saved into files to "
+                              "become part of the software project to address issue {issue_number} "
+                              "If so, use apply_unified_diff() or overwrite_file() tool to save the code "
+                              "to the files meant for these code snipets to be saved in."
+                              "if you are uncertain, use the dir_structure() tool to evaluate the current directory"
+                              "and then use the chat_with_other_agent() tool to ask {agt} to provide the filenames for the code snipets.").format
+        save_code_instructions = (f"apply_unified_diff() tool instruction: {tool_instructions['apply_unified_diff']}"
+                                  f"overwrite_file() tool instruction: {tool_instructions['overwrite_file']}"
+                                  f"chat_with_other_agent() tool instruction: {tool_instructions['chat_with_other_agent']}")
+
         # main orchestration loop
+        open_issues = get_open_issues()
         retry_count = config.RETRY_COUNT
         while (retry_count := retry_count - 1) > 0:
-            open_issues = get_open_issues()
             if not open_issues:
                 new_request = self.get_human_input("\nNo open issues. What would you like the team to tackle next: \n")
                 check_input = self.is_true(
@@ -279,11 +317,9 @@ class Orchestrator(BaseAgent):
                 else:
                     self.logger.warning("No agent found with name %s", open_issue.get('assignee'))
                     # if not assigned, assigned to someone does not exist, or assigned to myself, try assign it
-                    to_self_prompt = (f"Issue {issue_number} is assigned to {open_issue.get("assignee", "No One")},  "
-                                      "which does not exist. Based on these roles descriptions, use the issue_manager tool "
-                                      "action=assign to assign this issue to the most appropriate agent.\n"
-                                      f"agent_roles: {agent_roles}."
-                                      f"issue_manager() tool instruction: {tool_instructions['issue_manager']}")
+                    to_self_prompt = (assign_issue_template(issue_number=issue_number,
+                                                            assignee=open_issue.get("assignee", "No One"))
+                                      + assign_issue_instructions)
                     o_reply = self.perform_task(
                         to_self_prompt, f"self({self.name})", context={'issue': self.issue_manager(action='read', issue=open_issue.get('issue'))})
 
@@ -317,12 +353,9 @@ class Orchestrator(BaseAgent):
                 if issue_updated.is_true:
                     self.logger.info("Issue %s was updated by %s", issue_number, agt.name)
                 else:
-                    update_issue_prompt = (f"The assistant {agt.name} provided the following response. "
-                                        f"use issue_manager(action='update'...) to update the issue {issue_number} "
-                                        'and if needed, its sub-issues, according to the response provided by the assistant. '
-                    )
+                    update_issue_prompt = update_issue_template(agt=agt.name, issue_number=issue_number)
                     update_issue_reply = self.perform_task(update_issue_prompt, self.name, 
-                            context=[{'role': "user", 'content': str(self.issue_manager(action='read', issue=open_issue.get('issue')))},
+                            context=[{'role': "user", 'content': self.issue_manager(action='read_raw', issue=open_issue.get('issue'))},
                                         {'role': "user", 'content': to_agt_prompt}, 
                                         {'role': "assistant", 'content': agt_reply}])
                     issue_updated = self.is_true(
@@ -335,22 +368,20 @@ class Orchestrator(BaseAgent):
                             "Issue %s failed to save. Details: %s", issue_number, issue_updated.exaplanation)
 
                 ## check if the response include code snipets, if so save them to files
-                has_code_to_update = self.is_true(
-                    "Does the response include code snippets?", to_agt_prompt, json.dumps(agt_reply))
+                # a code fence or diff in the reply is enough to know it has code, only ask the LLM
+                # when there is none, as the reply may still contain unfenced code
+                agt_reply_content = agt_reply.get('content', '') if isinstance(agt_reply, dict) else str(agt_reply)
+                if _CODE_FENCE_RE.search(agt_reply_content or ''):
+                    has_code_to_update = self.BinaryAnswer(is_true=True, confidence_percentage=99.0,
+                                                           exaplanation="Code fence or diff found in the response.")
+                else:
+                    has_code_to_update = self.is_true(
+                        "Does the response include code snippets?", to_agt_prompt, json.dumps(agt_reply))
                 if has_code_to_update.is_true:
-                    save_code_prompt = (f"The assistant {agt.name} provided code snippets in the response. "
-                                        "Please evaluate if these code snippets should be saved into files to "
-                                        f"become part of the software project to address issue {issue_number} "
-                                        "If so, use apply_unified_diff() or overwrite_file() tool to save the code "
-                                        "to the files meant for these code snipets to be saved in."
-                                        f"if you are uncertain, use the dir_structure() tool to evaluate the current directory"
-                                        f"and then use the chat_with_other_agent() tool to ask {agt.name} to provide the filenames for the code snipets."
-                                        f"apply_unified_diff() tool instruction: {tool_instructions['apply_unified_diff']}"
-                                        f"overwrite_file() tool instruction: {tool_instructions['overwrite_file']}"
-                                        f"chat_with_other_agent() tool instruction: {tool_instructions['chat_with_other_agent']}"
-                    )
+                    save_code_prompt = (save_code_template(agt=agt.name, issue_number=issue_number)
+                                        + save_code_instructions)
                     save_code_reply = self.perform_task(save_code_prompt, self.name, 
-                            context=[{'role': "user", 'content': str(self.issue_manager(action='read', issue=open_issue.get('issue')))},
+                            context=[{'role': "user", 'content': self.issue_manager(action='read_raw', issue=open_issue.get('issue'))},
                                         {'role': "user", 'content': to_agt_prompt}, 
                                         {'role': "assistant", 'content': agt_reply}])
                     code_saved = self.is_true(
@@ -363,7 +394,7 @@ class Orchestrator(BaseAgent):
                                                 "sub-issues. Please include rationale of the change and brief "
                                                 f"description of the change.")
                         update_issue_reply = self.perform_task(update_issue_prompt, self.name, 
-                                context=[{'role': "user", 'content': str(self.issue_manager(action='read', issue=open_issue.get('issue')))},
+                                context=[{'role': "user", 'content': self.issue_manager(action='read_raw', issue=open_issue.get('issue'))},
                                             {'role': "user", 'content': to_agt_prompt}, 
                                             {'role': "assistant", 'content': agt_reply},
                                             {'role': "user", 'content': str(save_code_prompt)},
@@ -378,14 +409,14 @@ class Orchestrator(BaseAgent):
                 # if stage is "coding", run the code of the updated file to check if it is working
                 # if stage is "testing", run the main.py to check if the integration is working
                 # if stage is "deploy", run the docker-compose to check if the code can be deployed properly
-                stages = ["plan", "coding", "testing", "deploy"]
-                issue_stage = self.distill(
-                    f"Considering the content of issue #{issue_number}, which of the following stage is the issue in, {stages} ?"
-                    , '', json.dumps(self.issue_manager(action='read', issue=issue_number)))
+                if (issue_stage := _STATUS_TO_STAGE.get(str(open_issue.get('status', '')).lower())) is None:
+                    issue_stage = self.distill(
+                        f"Considering the content of issue #{issue_number}, which of the following stage is the issue in, {list(ISSUE_STAGES)} ?"
+                        , '', self.issue_manager(action='read_raw', issue=issue_number)).answer
 
-                match issue_stage.answer:
+                match issue_stage:
                     case "plan":
-                        self.logger("Issue %s is in plan stage, need to break it down to steps and sub-issues.", issue_number)
+                        self.logger.info("Issue %s is in plan stage, need to break it down to steps and sub-issues.", issue_number)
                         pass
                     case "coding":
                         # test the updated file - run the code using execute_module()
@@ -408,14 +439,16 @@ class Orchestrator(BaseAgent):
 
                 break
 
-                
-        open_issues = get_open_issues()
+            # the agents may have changed the status or assignee of any issue, and a reassigned or
+            # unsatisfactory issue has to be retried, so reload the open issues for the next iteration
+            open_issues = get_open_issues()
+
         if open_issues:
             self.logger.warning("Orchestrator tried %d times, but there are still open issues: %s.", config.RETRY_COUNT, open_issues)
         else:
             self.logger.info("Orchestrator successfully processed all open issues.")
 
-        return get_open_issues()
+        return open_issues
         # print("***************")
         # for reply in replies:
         #     print(f"===")
@@ -494,7 +527,8 @@ class OpenAIOrchestrator(openai_agent.OpenAI_Agent, Orchestrator):
             # for agt in agents:
             #     self.llm_client.beta.assistants.delete(agt.assistant.id)
             existing_assistants = self.llm_client.beta.assistants.list()
-            for ast in [ast for ast in existing_assistants.data if ast.name in [agt.name for agt in BaseAgent.instances(True)]]:
+            agent_names = {agt.name for agt in BaseAgent.instances(True)}
+            for ast in [ast for ast in existing_assistants.data if ast.name in agent_names]:
                 try:
                     self.llm_client.beta.assistants.delete(ast.id)
                 except Exception as err:
@@ -17,6 +17,23 @@ from .initialize_project import initialize_package, initialize_Dockerfile, initi
 from .log import logger
 from ..config import config
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib json module is used without it
+    orjson = None
+
+
+def _json_loads(data: str | bytes):
+    """Parse JSON, using orjson when it is installed."""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _load_json_file(path: str):
+    """Parse the JSON file at path, read as bytes so no text decoding layer is involved."""
+    with open(path, 'rb') as f:
+        return _json_loads(f.read())
+
+
 def get_dot_notation_value(dict_obj, dot_path, default=None):
     """
     Access nested dictionary values using dot notation
@@ -65,12 +82,17 @@ class Action(Enum):
     LIST = "list"
     CREATE = "create"
     READ = "read"
+    READ_RAW = "read_raw"
     UPDATE = "update"
     ASSIGN = "assign"
 
-def issue_manager(action: str, issue: str = '', only_in_state: list = [],
-                  content: str | None = None, assignee: str | None = None, caller: str = "unknown") -> dict | list:
-    """Manage issues: list, create, read, update, assign
+def issue_manager(action: str, issue: str = '', only_in_state: list | None = None,
+                  content: str | None = None, assignee: str | None = None, caller: str = "unknown") -> dict | list | str:
+    """Manage issues: list, create, read, read_raw, update, assign
+
+    read_raw returns the issue file content as stored, without parsing it,
+    for callers that only pass the issue on to an LLM as text.
+
     Example::
     >>> issue_manager("list", "0")
     '[{"issue": "0", "priority": "0", "status": "completed", "assignee": "unknown", "title": "initial bootstrap code"}]'
@@ -81,7 +103,7 @@ def issue_manager(action: str, issue: str = '', only_in_state: list = [],
     if isinstance(content, str):
         try:
             # correct one of the most common json string error - newline instead of \\n in it.
-            content_obj = json.loads(content.replace("\n", "\\n"))
+            content_obj = _json_loads(content.replace("\n", "\\n"))
         except Exception as e:
             logger.warning(
                 "%s cannot parse content '%s' as JSON.", action, content)
@@ -113,6 +135,10 @@ def issue_manager(action: str, issue: str = '', only_in_state: list = [],
         case 'list':
             issue_dir = os.path.join(config.ISSUE_BOARD_DIR, issue)
             results = []
+            states = set(only_in_state or ())
+            if "in progress" in states:
+                # sometimes AI will use "in process" instead of "in progress", we will try to accommodate that.
+                states.add("in process")
             for root, dirs, files in os.walk(issue_dir):
                 for file in files:
                     issue_number = root.removeprefix(
@@ -120,8 +146,7 @@ def issue_manager(action: str, issue: str = '', only_in_state: list = [],
                     if file == f"{issue_number.replace('/', '.')}.json":
                         file_path = os.path.join(root, file)
                         try:
-                            with open(file_path, 'r') as f:
-                                data = json.load(f)
+                            data = _load_json_file(file_path)
                             updates: list = data.get('updates', [])
                             logger.debug("before sorting: %s", updates)
                             if updates:
@@ -148,10 +173,7 @@ def issue_manager(action: str, issue: str = '', only_in_state: list = [],
                                 priority = data.get('priority', "4 - Low")
                                 updated_by = data.get('updated_by', "unknown")
                                 assigned_to = data.get('assignee', updated_by)
-                            if only_in_state and "in progress" in only_in_state:
-                                # sometimes AI will use "in process" instead of "in progress", we will try to accommodate that.s
-                                only_in_state.append("in process")
-                            if only_in_state and status not in only_in_state:
+                            if states and status not in states:
                                 continue
                             if assignee and assignee != assigned_to:
                                 continue
@@ -232,24 +254,34 @@ def issue_manager(action: str, issue: str = '', only_in_state: list = [],
                 issue_file = os.path.join(
                     issue_dir, f"{issue.replace('/', '.')}.json")
                 result = {'issue#': issue}
-                with open(issue_file, 'r') as jsonfile:
-                    data = json.load(jsonfile)
-                    updates = data.get('updates', [])
-                    result['latest_status'] = max(updates,
-                                                  key=lambda x: ('status' in x, x.get('updated_at', '2000-01-01T00:00:00.000')), default={}).get('status', "new")
-                    result['latest_priority'] = max(updates,
-                                                    key=lambda x: ('priority' in x, x.get('updated_at', '2000-01-01T00:00:00.000')), default={}).get('priority', "4 - Low")
-                    result['latest_updated_by'] = max(updates,
-                                                      key=lambda x: ('updated_by' in x, x.get('updated_at', '2000-01-01T00:00:00.000')), default={}).get('updated_by', "unknown")
-                    result['latest_assignee'] = max(updates,
-                                                    key=lambda x: ('assignee' in x, x.get('updated_at', '2000-01-01T00:00:00.000')), default={}).get('assignee', "unknown")
-                    result.update(data)
+                data = _load_json_file(issue_file)
+                updates = data.get('updates', [])
+                result['latest_status'] = max(updates,
+                                              key=lambda x: ('status' in x, x.get('updated_at', '2000-01-01T00:00:00.000')), default={}).get('status', "new")
+                result['latest_priority'] = max(updates,
+                                                key=lambda x: ('priority' in x, x.get('updated_at', '2000-01-01T00:00:00.000')), default={}).get('priority', "4 - Low")
+                result['latest_updated_by'] = max(updates,
+                                                  key=lambda x: ('updated_by' in x, x.get('updated_at', '2000-01-01T00:00:00.000')), default={}).get('updated_by', "unknown")
+                result['latest_assignee'] = max(updates,
+                                                key=lambda x: ('assignee' in x, x.get('updated_at', '2000-01-01T00:00:00.000')), default={}).get('assignee', "unknown")
+                result.update(data)
             except Exception as e:
                 logger.error("Cannot %s issue %s because %s", action,
                              issue, e, exc_info=e)
                 result = {"issue": issue, "status": "Error",
                           "message": f"Cannot read issue {issue} because {e}"}
 
+        case "read_raw":
+            issue_file = os.path.join(config.ISSUE_BOARD_DIR, issue, f"{issue.replace('/', '.')}.json")
+            try:
+                with open(issue_file, 'r') as jsonfile:
+                    result = jsonfile.read()
+            except Exception as e:
+                logger.error("Cannot %s issue %s because %s", action,
+                             issue, e, exc_info=e)
+                result = json.dumps({"issue": issue, "status": "Error",
+                                     "message": f"Cannot read issue {issue} because {e}"})
+
         case "update":
             if content_obj and "updated_at" not in content_obj:
                 content_obj['updated_at'] = datetime.now().strftime(
@@ -263,8 +295,7 @@ def issue_manager(action: str, issue: str = '', only_in_state: list = [],
             issue_file = os.path.join(
                 issue_dir, f"{issue.replace('/', '.')}.json")
             try:
-                with open(issue_file, 'r') as ifile:
-                    issue_content = json.load(ifile)
+                issue_content = _load_json_file(issue_file)
                 issue_updates = issue_content.get("updates", [])
                 if max(issue_updates, key=lambda x: ('status' in x, x.get('updated_at', 0)), default={}).get('status', "new") == "completed":
                     result = {"issue": issue, "status": "error",
@@ -293,8 +324,7 @@ def issue_manager(action: str, issue: str = '', only_in_state: list = [],
             issue_file = os.path.join(
                 issue_dir, f"{issue.replace('/', '.')}.json")
             try:
-                with open(issue_file, 'r') as ifile:
-                    issue_content = json.load(ifile)
+                issue_content = _load_json_file(issue_file)
                 if not content:
                     content_obj = {}
                 if "updated_at" not in content_obj:
@@ -305,16 +335,13 @@ def issue_manager(action: str, issue: str = '', only_in_state: list = [],
                 if "details" not in content_obj:
                     content_obj['details'] = f"assign #{issue} to {assignee}."
                 if assignee:
-                    agents_dir = os.path.join(os.path.dirname(
-                        os.path.dirname(__file__)), "agents")
-                    print(f"{agents_dir=}")
-                    agents_list = [entry.removesuffix(".json") for entry in os.listdir(
-                        agents_dir) if entry.endswith(".json")]
-                    if assignee in agents_list:
+                    # imported here, the defs package imports this module
+                    from ..defs.agent_defs import agents_list, is_agent
+                    if is_agent(assignee):
                         content_obj['assignee'] = assignee
                     else:
                         result = {"issue": issue, "status": "error", "message": f"Assignee {
-                            assignee} is not a valid agent, please only assign to one of the following agents: {[agents_list]}."}
+                            assignee} is not a valid agent, please only assign to one of the following agents: {list(agents_list)}."}
                         return result
                 else:
                     content_obj['assignee'] = caller
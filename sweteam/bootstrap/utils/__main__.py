@@ -1,58 +1,80 @@
 """module script to be used when utils is called directly at cli"""
-import json
+import io
 import os
 import sys
 from . import dir_structure, issue_manager
 from .log import logger
-from .initialize_project import initialize_agent_files
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_MODULE_NAME = os.path.basename(__file__)
+_USAGE = f"Usage: python -m {_MODULE_NAME} [test|update_agents|issue_manager|dir_structure]"
+_ISSMAN_USAGE = (f"Usage: python -m {_MODULE_NAME} issue_manager list|read|update|create [issue='1/1'] "
+                 "[only_in_state='new,in progress'] [content='json str of an issue update']")
+
+# key=value arguments accepted by the issue_manager subcommand
+_ISSMAN_KEYS = frozenset({"content", "only_in_state", "issue", "assignee"})
+
+
+def _write_report(text: str) -> None:
+    """Write text to stdout as one encoded block, box characters the console can't encode are replaced"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(text.encode(sys.stdout.encoding or "utf-8", errors="replace"))
+    sys.stdout.buffer.flush()
 
 
 def test() -> None:
     import doctest
-    doctest.testmod()
+    runner = doctest.DocTestRunner()
+    for t in doctest.DocTestFinder().find(sys.modules[__name__]):
+        if t.examples:
+            runner.run(t)
+    runner.summarize(verbose=False)
 
 
 if __name__ == "__main__":
-    import sys
     if len(sys.argv) > 1:
         match sys.argv[1]:
             case "update_agents":
                 if os.path.exists(os.path.join(os.getcwd(), "agents")):
                     agent_parent_dir = os.getcwd()
                 else:
-                    agent_parent_dir = os.path.dirname(
-                        os.path.dirname(__file__))
+                    agent_parent_dir = os.path.dirname(_HERE)
 
                 print("local run of util on " + agent_parent_dir)
 
+                # only update_agents needs the agent definitions, don't import them for the other subcommands
+                from .initialize_project import initialize_agent_files
+
                 initialize_agent_files(agent_parent_dir)
                 sys.exit(0)
             case "issue_manager":
-                issman_args = {}
-                only_in_state = []
+                if len(sys.argv) < 3:
+                    print(_ISSMAN_USAGE)
+                    sys.exit(0)
+                issman_args = {"action": sys.argv[2]}
+                for arg in sys.argv[3:]:
+                    key, _, value = arg.partition("=")
+                    if key in _ISSMAN_KEYS:
+                        issman_args[key] = value.split(",") if key == "only_in_state" else value
                 try:
-                    issman_args["action"] = sys.argv[2]
-                    for i in range(3, len(sys.argv)):
-                        if sys.argv[i].startswith("content="):
-                            issman_args["content"] = sys.argv[i].removeprefix(
-                                "content=")
-                        if sys.argv[i].startswith("only_in_state"):
-                            issman_args["only_in_state"] = sys.argv[i].removeprefix(
-                                "only_in_state=").split(",")
-                        if sys.argv[i].startswith("issue="):
-                            issman_args["issue"] = sys.argv[i].removeprefix(
-                                ("issue="))
-                        if sys.argv[i].startswith("assignee="):
-                            issman_args["assignee"] = sys.argv[i].removeprefix(
-                                ("assignee="))
                     issue_result = issue_manager(**issman_args)
                     if isinstance(issue_result, list):
                         issue_result.sort(key=lambda x: tuple(
                             map(int, x.get("issue").split("/"))))
+                except Exception as e:
+                    logger.error(f"Error processing issue_manager request: {
+                          e}, at line {e.__traceback__.tb_lineno}", exc_info=e)
+                    print(_ISSMAN_USAGE)
+                    sys.exit(0)
+
+                # collect the report and write it out in one go instead of a print() per field
+                buf = io.StringIO()
+                row_formats = {}
+                try:
                     for key_ in issue_result:
                         if isinstance(key_, str):
                             if key_ == "updates":
-                                print(f"{key_.upper()}:")
+                                buf.write(f"{key_.upper()}:\n")
                                 for upd in issue_result[key_]:
                                     upd_len = len(upd)
                                     for seq, key in enumerate(upd):
@@ -66,32 +88,34 @@ if __name__ == "__main__":
                                             case _:
                                                 border_char = f" {
                                                     0x251c:c}{0x2500:c}"
-                                        print(f"    {border_char}\t{
-                                              key.capitalize()}: {upd[key]}")
+                                        buf.write(f"    {border_char}\t{
+                                                  key.capitalize()}: {upd[key]}\n")
                             else:
-                                print(f"{key_.upper()}: {issue_result[key_]}")
+                                buf.write(f"{key_.upper()}: {issue_result[key_]}\n")
                         else:
-                            print("-", end="")
-                            for key in key_:
-                                print(f" {key:7}: {key_[key]:11}", end=" ")
-                            print("\t")
+                            # listed issues share a handful of key sets, build each row template once
+                            keys = tuple(key_)
+                            row_format = row_formats.get(keys)
+                            if row_format is None:
+                                row_format = row_formats[keys] = "-" + "".join(
+                                    f" {key:7}: {{{key}!s:11}} " for key in keys) + "\t\n"
+                            buf.write(row_format.format_map(key_))
                 except Exception as e:
-                    logger.error(f"Error processing issue_manager request: {
+                    # a malformed issue row, report what was formatted so far and log the error
+                    logger.error(f"Error formatting issue_manager result: {
                           e}, at line {e.__traceback__.tb_lineno}", exc_info=e)
-                    print(f"Usage: python -m {os.path.basename(
-                        __file__)} issue_manager list|read|update|create [issue='1/1'] [only_in_state='new,in progress'] [content='json str of an issue update']")
+                _write_report(buf.getvalue())
                 sys.exit(0)
             case "dir_structure":
                 dir_structure_args = {}
-                for i in range(2, len(sys.argv)):
-                    if sys.argv[i].startswith("actual_only="):
-                        dir_structure_args["actual_only"] = sys.argv[i].removeprefix(
-                            "actual_only=") == "True"
-                    elif sys.argv[i].startswith("output_format="):
-                        dir_structure_args["output_format"] = sys.argv[i].removeprefix(
-                            "output_format=")
+                for arg in sys.argv[2:]:
+                    key, sep, value = arg.partition("=")
+                    if key == "actual_only" and sep:
+                        dir_structure_args["actual_only"] = value == "True"
+                    elif key == "output_format" and sep:
+                        dir_structure_args["output_format"] = value
                     else:
-                        dir_structure_args["path"] = sys.argv[i]
+                        dir_structure_args["path"] = arg
 
                 print(dir_structure(**dir_structure_args))
 
@@ -102,5 +126,4 @@ if __name__ == "__main__":
             case _ as wrong_arg:
                 logger.warning(f"{wrong_arg} is not a valid option")
 
-    print(f"Usage: python -m {os.path.basename(__file__)
-                              } [test|update_agents|issue_manager|dir_structure]")
+    print(_USAGE)
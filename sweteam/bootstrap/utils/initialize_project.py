@@ -1,41 +1,95 @@
+import contextlib
 import os
+from pathlib import Path
 from .log import logger
 
+def _write_new_file(path: str, content: str, executable: bool = False) -> None:
+    """Create path and write content to it, raise FileExistsError if path already exists.
+
+    O_EXCL turns the existence check and the creation into one atomic open().
+    The file is created as 0o666, or 0o777 if executable, less the umask, the same as open() would.
+    """
+    mode = 0o777 if executable else 0o666
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+    try:
+        data = content.encode()
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+
+
+def _replace_file(path: str, data: bytes) -> None:
+    """Write data to a temporary file next to path and rename it over path
+
+    os.replace() is atomic, a failure halfway through leaves the original file untouched instead of truncated.
+    The temporary file gets the mode of the file it replaces, so e.g. its permission bits are kept.
+    """
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with contextlib.suppress(FileNotFoundError):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
+
+
+def _iter_agent_files(agents_dir: str):
+    """Yield (agent_name, path) for each agent json file in agents_dir, straight from the scandir() entries"""
+    with os.scandir(agents_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".json") and entry.is_file(follow_symlinks=False):
+                yield entry.name[:-5], entry.path
+
 
 def initialize_agent_files(agent_parent_dir: str | None = None) -> str:
     """Initialize the agent files
     """
     logger.debug(
         f"<Initializing> - updating agents instructions as part of project setup. Should not be used in production")
-    import os
     import json
-    from ..defs.agent_defs import agents, tool_instructions, standard_tools
+    from ..defs.agent_defs import agents, agents_dir as default_agents_dir, tool_instructions, tool_fns, read_agent_json
 
-    agents_dir = os.path.join(
-        agent_parent_dir if agent_parent_dir else os.path.dirname(os.path.dirname(__file__)), "agents")
+    agents_dir = os.path.join(agent_parent_dir, "agents") if agent_parent_dir else default_agents_dir
     logger.info(f"updating agent info in {agents_dir=}")
-    agent_json_files = [entry for entry in os.listdir(agents_dir) if entry.endswith(".json")]
-    for agent_json in agent_json_files:
-        fullpath_json = os.path.join(agents_dir, agent_json)
-        agent_name = agent_json.removesuffix(".json")
-        if agents.get(agent_name):
-            agent: dict = agents.get(agent_name)
-            with open(fullpath_json, "r") as f:
-                config_in_json: dict = json.load(f)
+    # the tool instructions appended to each agent's own instruction only depend on its tool list,
+    # join them once per agent instead of growing the instruction string one tool at a time
+    tools_instructions = {name: "".join(tool_instructions.get(tool, '') for tool in agent.get("tools", [])
+                                        if isinstance(tool, str))
+                          for name, agent in agents.items()}
+    updated = total = 0
+    # list the directory before rewriting anything, renaming the updated files into it while scandir()
+    # is still iterating could make the same file show up twice. Sorted, so agents are updated in a stable order
+    for agent_name, fullpath_json in sorted(_iter_agent_files(agents_dir)):
+        total += 1
+        if agent_name in agents:
+            agent: dict = agents[agent_name]
+            current_config: dict = read_agent_json(agent_name, agents_dir)
 
-            config_in_json.update(agent)
+            # build the new config in a fresh dict so it can be compared with what is on disk,
+            # and copy the tools list so expanding the tool names doesn't change agents[agent_name]
+            config_in_json = {**current_config, **agent}
+            if "tools" in agent:
+                config_in_json["tools"] = list(agent["tools"])
 
             for idx, tool in enumerate(agent.get("tools",[])):
                 if isinstance(tool, str):
                     index = config_in_json["tools"].index(tool)
-                    config_in_json["tools"][index:index+1] = [t for t in standard_tools if t.get("function",{"name":""}).get("name") == tool]
-                    config_in_json["instruction"] = config_in_json.get("instruction", '') \
-                        + tool_instructions.get(tool,'')
+                    config_in_json["tools"][index:index+1] = [t.to_dict() for t in tool_fns if t.name == tool]
+            if tools_instructions[agent_name]:
+                config_in_json["instruction"] = config_in_json.get("instruction", '') + tools_instructions[agent_name]
 
-            with open(fullpath_json, "w") as f:
-                json.dump(config_in_json, f, indent=4)
+            if config_in_json == current_config:
+                logger.debug(f"{fullpath_json} is up to date, not rewriting it")
+                continue
+            _replace_file(fullpath_json, json.dumps(config_in_json, indent=4).encode())
+            updated += 1
     logger.info(
-        f"<Initializing> - updated {len(agent_json_files)} agents instructions")
+        f"<Initializing> - updated {updated} of {total} agents instructions")
     return 'done.'
 
 
@@ -90,23 +144,25 @@ else
     docker-compose logs
 fi
 """
-    if os.path.exists(script_path):
+    try:
+        _write_new_file(script_path, base_script, executable=True)
+    except FileExistsError:
         return (f"<init startup script> {script_path} already exist, will not overwrite it, exiting...")
+    except Exception as e:
+        return f"<init startup script> got an Error: {e}"
     else:
-        try:
-            with open(script_path, "w") as df:
-                df.write(base_script)
-            current_permissions = os.stat(script_path).st_mode
-            os.chmod(script_path, current_permissions | 0o111)
-        except Exception as e:
-            return f"<init startup script> got an Error: {e}"
-        else:
-            return f"<init startup script> {script_path} for {project_name} has been successfully initialized."
+        return f"<init startup script> {script_path} for {project_name} has been successfully initialized."
 
 
 def initialize_Dockerfile(project_name: str | None = None, dockerfile_path: str | None = None) -> str:
     """Initialize the Dockerfile in the given directory
     """
+    if project_name is None or dockerfile_path is None:
+        cwd = os.getcwd()
+        if project_name is None:
+            project_name = os.path.basename(cwd)
+        if dockerfile_path is None:
+            dockerfile_path = os.path.join(cwd, "Dockerfile")
     base_Dockerfile = f"""\
 # Use an official Python runtime as a parent image
 FROM python:3.12-slim
@@ -129,23 +185,16 @@ COPY . .
 # Specify the command to run your application
 CMD ["poetry", "run", "python", "-m", "{project_name}"]
 """
-    if project_name is None:
-        project_name = os.path.basename((os.getcwd()))
-    if dockerfile_path is None:
-        dockerfile_path = os.path.join(os.getcwd(), "Dockerfile")
-    base_Dockerfile.replace("{project_name}", project_name)
-    if os.path.exists(dockerfile_path):
+    try:
+        _write_new_file(dockerfile_path, base_Dockerfile)
+    except FileExistsError:
         result = (f"<init Dockerfile> {
                   dockerfile_path} already exist, will not overwrite it, exiting...\n")
+    except Exception as e:
+        result = f"<init Dockerfile> got an Error: {e}\n"
     else:
-        try:
-            with open(dockerfile_path, "w") as df:
-                df.write(base_Dockerfile)
-        except Exception as e:
-            result = f"<init Dockerfile> got an Error: {e}\n"
-        else:
-            result = f"<init Dockerfile> {dockerfile_path} for {
-                project_name} has been successfully initialized.\n"
+        result = f"<init Dockerfile> {dockerfile_path} for {
+            project_name} has been successfully initialized.\n"
     base_docker_compose = f"""\
 services:
   {project_name}:
@@ -157,34 +206,21 @@ services:
 """
     docker_compose_path = os.path.join(os.path.dirname(
         (dockerfile_path)), "docker-compose.yaml")
-    if os.path.exists(docker_compose_path):
+    try:
+        _write_new_file(docker_compose_path, base_docker_compose)
+    except FileExistsError:
         result += (f"<init Dockerfile> {
                    docker_compose_path} already exist, will not overwrite it, exiting...")
+    except Exception as e:
+        result += f"<init Dockerfile> got an Error: {e}"
     else:
-        try:
-            with open(docker_compose_path, "w") as df:
-                df.write(base_docker_compose)
-        except Exception as e:
-            result += f"<init Dockerfile> got an Error: {e}"
-        else:
-            result += f"<init Dockerfile> {docker_compose_path} for {
-                project_name} has been successfully initialized."
+        result += f"<init Dockerfile> {docker_compose_path} for {
+            project_name} has been successfully initialized."
     return result
 
 
-def initialize_package(package_dir: str | None = None) -> str:
-    """Initialize the __init__.py and __manin__.py files of a package.
-
-    Args:
-      package_dir: the path to the package, default is the namesake of the project
-
-    Returns:
-      the status of the package initializatio
-    """
-    if package_dir is None:
-        # the default package dir is a namesake of the project under the project_dir
-        package_dir = os.path.join(os.getcwd(), os.path.basename(os.getcwd()))
-    base_main = '''\
+# __main__.py of a new project package, the same for every project so it is encoded once
+_BASE_MAIN = b'''\
 """Project base package.
 
 Example::
@@ -198,10 +234,23 @@ def test() -> str:
 if __name__ == "__main__":
     test()
 '''
+
+
+def initialize_package(package_dir: str | None = None) -> str:
+    """Initialize the __init__.py and __manin__.py files of a package.
+
+    Args:
+      package_dir: the path to the package, default is the namesake of the project
+
+    Returns:
+      the status of the package initializatio
+    """
+    if package_dir is None:
+        # the default package dir is a namesake of the project under the project_dir
+        cwd = os.getcwd()
+        package_dir = os.path.join(cwd, os.path.basename(cwd))
     try:
-        main_file_path = os.path.join(package_dir, "__main__.py")
-        with open(main_file_path, "w") as mf:
-            mf.write(base_main)
+        Path(package_dir, "__main__.py").write_bytes(_BASE_MAIN)
     except Exception as e:
         return f"<Init package> received Error: {e}"
     else: